@@ -0,0 +1,211 @@
+import struct
+
+from classes.creature import Creature
+from classes.point2d import Point2d
+from classes.tree import Tree
+
+HEADER = struct.Struct('<8sH')  # Magic, grid size
+MAGIC = b'ECOLOG1\n'
+
+# Event kinds
+MOVE = 1
+FEED = 2
+MATE = 3
+BIRTH = 4
+DEATH = 5
+TREE = 6
+REMOVE_TREE = 7
+RESET = 8
+TURN = 9
+
+# Payload layout following the kind byte of each event
+PAYLOADS = {
+    MOVE: struct.Struct('<IHHd'),  # Creature, x, y, energy
+    FEED: struct.Struct('<II'),  # Creature, tree
+    MATE: struct.Struct('<II'),  # Creature, partner
+    BIRTH: struct.Struct('<IIHHd'),  # Creature, parent (0 for none), x, y, energy
+    DEATH: struct.Struct('<I'),  # Creature
+    TREE: struct.Struct('<IHHI'),  # Tree, x, y, food
+    REMOVE_TREE: struct.Struct('<I'),  # Tree
+    RESET: struct.Struct('<Id'),  # Creature, energy it is reset to
+    TURN: struct.Struct('<III'),  # Population, food eaten, new creatures
+}
+
+class EventRecorder:
+    """Writes simulation events to a compact binary log"""
+    def __init__(self, filename: str, grid_size: int):
+        self.filename = filename
+        self.grid_size = grid_size
+        self.ids = {}  # Object -> id, ids start at 1 so 0 can mean none
+        self.next_id = 1
+        self.buffer = bytearray()
+
+        with open(self.filename, 'wb') as outfile:
+            outfile.write(HEADER.pack(MAGIC, grid_size))
+
+    def __repr__(self) -> str:
+        """A string representation of the self object"""
+        return f"EventRecorder({self.filename}, {self.grid_size})"
+
+    def key(self, obj) -> int:
+        """Get the id of a creature or tree, giving it one if it is new"""
+        if obj not in self.ids:
+            self.ids[obj] = self.next_id
+            self.next_id += 1
+        return self.ids[obj]
+
+    def write(self, kind: int, *fields):
+        """Add an event to the buffer"""
+        self.buffer.append(kind)
+        self.buffer += PAYLOADS[kind].pack(*fields)
+
+    def move(self, creature: Creature):
+        """Record a creature moving to its current position"""
+        self.write(MOVE, self.key(creature), creature.pos.x, creature.pos.y, creature.energy)
+
+    def feed(self, creature: Creature, tree: Tree):
+        """Record a creature eating one food from a tree"""
+        self.write(FEED, self.key(creature), self.key(tree))
+
+    def mate(self, creature: Creature, partner: Creature):
+        """Record two creatures mating"""
+        self.write(MATE, self.key(creature), self.key(partner))
+
+    def birth(self, creature: Creature, parent: Creature = None):
+        """Record a new creature"""
+        parent_id = self.key(parent) if parent else 0
+        self.write(BIRTH, self.key(creature), parent_id, creature.pos.x, creature.pos.y, creature.energy)
+
+    def death(self, creature: Creature):
+        """Record a creature dying"""
+        self.write(DEATH, self.ids.pop(creature, 0))
+
+    def tree(self, tree: Tree):
+        """Record a new tree"""
+        self.write(TREE, self.key(tree), tree.pos.x, tree.pos.y, tree.food)
+
+    def remove_tree(self, tree: Tree):
+        """Record a tree being removed"""
+        self.write(REMOVE_TREE, self.ids.pop(tree, 0))
+
+    def reset(self, creature: Creature):
+        """Record a creature having its energy and food reset"""
+        self.write(RESET, self.key(creature), creature.energy)
+
+    def turn(self, population: int, food_eaten: int, new_creatures: int):
+        """Record the end of a turn and flush the buffer to file"""
+        self.write(TURN, population, food_eaten, new_creatures)
+        with open(self.filename, 'ab') as outfile:
+            outfile.write(self.buffer)
+        self.buffer.clear()
+
+class EventReplayer:
+    """Rebuilds simulation state from an event log without simulating"""
+    def __init__(self, filename: str, keyframe_interval: int = 10):
+        self.filename = filename
+        self.keyframe_interval = keyframe_interval
+        self.events = []  # (kind, fields)
+        self.turn_ends = []  # Index of the event after each turn
+        self.stats = []  # (population, food eaten, new creatures) per turn
+        self.keyframes = {}  # Turn -> (creatures, trees)
+
+        with open(self.filename, 'rb') as infile:
+            data = infile.read()
+
+        magic, self.grid_size = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not an event log")
+
+        offset = HEADER.size
+        while offset < len(data):
+            kind = data[offset]
+            payload = PAYLOADS[kind]
+            self.events.append((kind, payload.unpack_from(data, offset + 1)))
+            offset += 1 + payload.size
+            if kind == TURN:
+                self.turn_ends.append(len(self.events))
+                self.stats.append(self.events[-1][1])
+
+        self.build_keyframes()
+
+    def __repr__(self) -> str:
+        """A string representation of the self object"""
+        return f"EventReplayer({self.filename}, {self.keyframe_interval})"
+
+    def __len__(self) -> int:
+        """Number of recorded turns"""
+        return len(self.turn_ends)
+
+    def build_keyframes(self):
+        """Play the log once, keeping a copy of the state every keyframe interval"""
+        creatures, trees = {}, {}
+        start = 0
+        for turn, end in enumerate(self.turn_ends):
+            self.apply(creatures, trees, start, end)
+            start = end
+            if turn % self.keyframe_interval == 0:
+                self.keyframes[turn] = self.copy_state(creatures, trees)
+
+    def copy_state(self, creatures: dict, trees: dict):
+        """Copy creature and tree state"""
+        return ({k: v.copy() for k, v in creatures.items()}, {k: v.copy() for k, v in trees.items()})
+
+    def apply(self, creatures: dict, trees: dict, start: int, end: int):
+        """Apply events start to end to the state"""
+        # Creatures are [x, y, energy, food, has_mated], trees are [x, y, food]
+        for kind, fields in self.events[start:end]:
+            # Objects placed on the grid outside of the recorded methods are skipped
+            if kind == MOVE and fields[0] in creatures:
+                creature = creatures[fields[0]]
+                creature[0], creature[1], creature[2] = fields[1], fields[2], fields[3]
+            elif kind == FEED:
+                if fields[0] in creatures:
+                    creatures[fields[0]][3] = True
+                if fields[1] in trees:
+                    trees[fields[1]][2] -= 1
+            elif kind == MATE:
+                for creature_id in fields:
+                    if creature_id in creatures:
+                        creatures[creature_id][4] = True
+            elif kind == BIRTH:
+                creatures[fields[0]] = [fields[2], fields[3], fields[4], False, False]
+            elif kind == DEATH:
+                creatures.pop(fields[0], None)
+            elif kind == TREE:
+                trees[fields[0]] = [fields[1], fields[2], fields[3]]
+            elif kind == REMOVE_TREE:
+                trees.pop(fields[0], None)
+            elif kind == RESET and fields[0] in creatures:
+                creature = creatures[fields[0]]
+                creature[2] = fields[1]
+                creature[3] = False
+
+    def state(self, turn: int):
+        """Creature and tree state when the given turn was saved"""
+        if not 0 <= turn < len(self):
+            raise IndexError(f"turn {turn} not in log")
+
+        keyframe = turn - turn % self.keyframe_interval
+        creatures, trees = self.copy_state(*self.keyframes[keyframe])
+        self.apply(creatures, trees, self.turn_ends[keyframe], self.turn_ends[turn])
+        return creatures, trees
+
+    def grid(self, turn: int):
+        """Rebuild the grid of creatures and trees at the given turn"""
+        creatures, trees = self.state(turn)
+        grid = [[[] for _ in range(self.grid_size)] for _ in range(self.grid_size)]
+
+        for x, y, energy, food, has_mated in creatures.values():
+            creature = Creature(Point2d(x, y), energy)
+            creature.food = food
+            creature.has_mated = has_mated
+            grid[x][y].append(creature)
+
+        for x, y, food in trees.values():
+            grid[x][y].append(Tree(Point2d(x, y), food))
+
+        return grid
+
+    def statistics(self, data_index: int):
+        """Per turn values of one saved statistic"""
+        return [stats[data_index] for stats in self.stats]
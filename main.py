@@ -1,9 +1,11 @@
 import matplotlib.pyplot as plt
 import numpy as np
 import random
+from concurrent.futures import ThreadPoolExecutor
 
 from classes.creature import Creature
 from classes.point2d import Point2d
+from classes.recorder import EventRecorder
 from classes.tree import Tree
 
 FILE_HEADER = "Population, Food eaten, New creatures"
@@ -14,13 +16,19 @@ class Simulation:
     food_eaten = 0
     new_creatures = 0
     default_energy = 10
-    def __init__(self, start_population: int, num_trees:int, grid_size: int, filename: str):
+    def __init__(self, start_population: int, num_trees:int, grid_size: int, filename: str,
+                 synchronous: bool = False, workers: int = 4, tile_size: int = 8, log_filename: str = None):
         """Run the simulation"""
         self.population = start_population
         self.num_trees = num_trees
         self.grid_size = grid_size
         self.grid = self.create_grid(grid_size)
         self.filename = filename
+        self.synchronous = synchronous  # Double-buffered turns instead of in place updates
+        self.workers = workers  # Threads used for tiles in synchronous turns
+        self.tile_size = tile_size  # Width of the square tiles in synchronous turns
+        self.log_filename = log_filename  # Optional binary event log for replays
+        self.recorder = None
     
     def __repr__(self) -> str:
         """A string representation of the self object"""
@@ -35,6 +43,8 @@ class Simulation:
         # TODO: Thread
         with open(self.filename, 'w') as outfile:
             outfile.write(FILE_HEADER)
+        if self.log_filename:
+            self.recorder = EventRecorder(self.log_filename, self.grid_size)
         
         self.populate_grid(self.population)
         self.add_trees()  # Add some trees with food
@@ -60,6 +70,8 @@ class Simulation:
             y = random.randint(0, self.grid_size - 1)
             creature = Creature(Point2d(x, y))
             self.grid[x][y].append(creature)
+            if self.recorder:
+                self.recorder.birth(creature)
             placed_creatures += 1
 
     def add_trees(self):
@@ -70,6 +82,8 @@ class Simulation:
             y = random.randint(0, self.grid_size - 1)
             tree = Tree(Point2d(x, y))
             self.grid[x][y].append(tree)
+            if self.recorder:
+                self.recorder.tree(tree)
             placed_trees += 1
 
     def move(self, creature: Creature, new_pos: Point2d):
@@ -78,9 +92,15 @@ class Simulation:
         if creature.move(new_pos):
             self.grid[old_pos.x][old_pos.y].remove(creature)
             self.grid[new_pos.x][new_pos.y].append(creature)
+            if self.recorder and new_pos != old_pos:
+                self.recorder.move(creature)
 
     def turn(self):
         """One turn of simulation"""
+        if self.synchronous:
+            self.synchronous_turn()
+            return
+        
         for i in range(self.grid_size):
             for j in range(self.grid_size):
                 cell = self.grid[i][j]
@@ -109,6 +129,175 @@ class Simulation:
         self.save_turn_data()
         self.reset()
         
+    def synchronous_turn(self):
+        """One turn of simulation read from the current state and written to the next state
+        
+        Differs from the in place turn in two ways. There is no move towards a mate, since
+        find_closest_mate counts the creature itself and so never moves it away in place either.
+        Unmated survivors only pair with other survivors that ended their food move in the same
+        cell, rather than with any unmated creature in the cell at the time.
+        """
+        creatures, trees, current = self.snapshot()
+        count = len(creatures)
+        next_pos = current['creature_pos'].copy()
+        next_energy = current['energy'].copy()
+        fed = np.zeros(count, dtype=bool)
+        mated = current['has_mated'].copy()
+        partner = np.full(count, -1)
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # Move every creature towards the closest food seen at the start of the turn
+            tiles = self.split_tiles(current['creature_pos'])
+            list(executor.map(lambda idx: self.move_tile(idx, current, next_pos, next_energy), tiles))
+            
+            # Feed and mate creatures by the tile they moved into
+            next_pos.flags.writeable = False
+            next_energy.flags.writeable = False
+            tiles = self.split_tiles(next_pos)
+            list(executor.map(lambda idx: self.feed_and_mate_tile(idx, current, next_pos, next_energy,
+                                                                  fed, mated, partner), tiles))
+        
+        self.food_eaten += int(fed.sum())
+        self.write_next_state(creatures, trees, current, next_pos, next_energy, fed, mated, partner)
+        
+        self.current_turn += 1
+        self.save_turn_data()
+        self.reset()
+    
+    def snapshot(self):
+        """Copy the grid into read only arrays for a synchronous turn"""
+        creatures = []
+        trees = []
+        for i in range(self.grid_size):
+            for j in range(self.grid_size):
+                for obj in self.grid[i][j]:
+                    if isinstance(obj, Creature):
+                        creatures.append(obj)
+                    if isinstance(obj, Tree):
+                        trees.append(obj)
+        
+        current = {
+            'creature_pos': np.array([(c.pos.x, c.pos.y) for c in creatures], dtype=np.int64).reshape(-1, 2),
+            'energy': np.array([c.energy for c in creatures], dtype=float),
+            'has_mated': np.array([c.has_mated for c in creatures], dtype=bool),
+            'tree_pos': np.array([(t.pos.x, t.pos.y) for t in trees], dtype=np.int64).reshape(-1, 2),
+            'tree_food': np.array([t.food for t in trees], dtype=np.int64),
+        }
+        
+        # Like distribute_food, a cell only feeds from the last tree in it
+        current['feeding_tree'] = np.full(self.grid_size ** 2, -1)
+        np.maximum.at(current['feeding_tree'], self.cell_index(current['tree_pos']), np.arange(len(trees)))
+        current['cell_food'] = np.append(current['tree_food'], 0)[current['feeding_tree']]  # -1 picks the 0
+        
+        for array in current.values():
+            array.flags.writeable = False
+        return creatures, trees, current
+    
+    def cell_index(self, positions: np.ndarray):
+        """Flatten grid positions to cell numbers"""
+        return positions[:, 0] * self.grid_size + positions[:, 1]
+    
+    def split_tiles(self, positions: np.ndarray):
+        """Group creature indices by the tile their position falls in"""
+        tiles_per_row = -(-self.grid_size // self.tile_size)
+        tile_ids = (positions[:, 0] // self.tile_size) * tiles_per_row + positions[:, 1] // self.tile_size
+        order = np.argsort(tile_ids, kind='stable')
+        boundaries = np.flatnonzero(np.diff(tile_ids[order])) + 1
+        return [idx for idx in np.split(order, boundaries) if len(idx)]
+    
+    def move_tile(self, idx: np.ndarray, current: dict, next_pos: np.ndarray, next_energy: np.ndarray):
+        """Move the creatures of one tile to their closest food"""
+        targets = current['tree_pos'][current['tree_food'] > 0]
+        if not len(targets):
+            return
+        
+        pos = current['creature_pos'][idx]
+        energy = current['energy'][idx]
+        offsets = pos[:, None, :] - targets[None, :, :]
+        distances = np.sqrt((offsets ** 2).sum(axis=2))
+        
+        # argmin keeps the first tree in scan order on ties, like find_closest_food
+        closest = distances.argmin(axis=1)
+        distance = distances[np.arange(len(idx)), closest]
+        can_move = distance <= energy
+        
+        next_pos[idx] = np.where(can_move[:, None], targets[closest], pos)
+        next_energy[idx] = np.where(can_move, energy - distance, energy)
+    
+    def feed_and_mate_tile(self, idx: np.ndarray, current: dict, next_pos: np.ndarray, next_energy: np.ndarray,
+                           fed: np.ndarray, mated: np.ndarray, partner: np.ndarray):
+        """Feed and mate the creatures that ended their move in one tile"""
+        cells = self.cell_index(next_pos[idx])
+        
+        # Highest energy creatures eat first, ties go to the earliest creature in scan order
+        order = np.lexsort((idx, -next_energy[idx], cells))
+        rank = self.rank_in_cell(cells[order])
+        fed[idx[order]] = rank < current['cell_food'][cells[order]]
+        
+        # Unmated survivors pair up with the next unmated survivor in their cell
+        candidates = idx[fed[idx] & ~current['has_mated'][idx]]
+        if not len(candidates):
+            return
+        candidate_cells = self.cell_index(next_pos[candidates])
+        order = np.lexsort((candidates, candidate_cells))
+        rank = self.rank_in_cell(candidate_cells[order])
+        has_partner = np.r_[candidate_cells[order][1:] == candidate_cells[order][:-1], False]
+        leads = (rank % 2 == 0) & has_partner
+        follows = np.r_[False, leads[:-1]]
+        mated[candidates[order][leads | follows]] = True
+        partner[candidates[order][leads]] = candidates[order][follows]
+    
+    def rank_in_cell(self, sorted_cells: np.ndarray):
+        """Position of each entry within its run of equal cells"""
+        positions = np.arange(len(sorted_cells))
+        starts = np.r_[True, sorted_cells[1:] != sorted_cells[:-1]] if len(sorted_cells) else np.zeros(0, dtype=bool)
+        return positions - np.maximum.accumulate(np.where(starts, positions, 0))
+    
+    def write_next_state(self, creatures: list, trees: list, current: dict, next_pos: np.ndarray,
+                         next_energy: np.ndarray, fed: np.ndarray, mated: np.ndarray, partner: np.ndarray):
+        """Build the next grid from the next state arrays"""
+        grid = self.create_grid(self.grid_size)
+        eaters = {}  # Cell -> fed creatures
+        
+        for k, creature in enumerate(creatures):
+            if not fed[k]:
+                self.death(creature)
+                continue
+            new_pos = Point2d(int(next_pos[k][0]), int(next_pos[k][1]))
+            moved = new_pos != creature.pos
+            creature.pos = new_pos
+            creature.energy = float(next_energy[k])
+            creature.food = True
+            creature.has_mated = bool(mated[k])
+            if self.recorder and moved:
+                self.recorder.move(creature)
+            grid[new_pos.x][new_pos.y].append(creature)
+            eaters.setdefault(new_pos.x * self.grid_size + new_pos.y, []).append(creature)
+        
+        # Take the eaten food from the tree each cell feeds from
+        for cell, cell_eaters in eaters.items():
+            tree = trees[current['feeding_tree'][cell]]
+            cell_eaters.sort(key=lambda c: c.energy, reverse=True)  # Feeding order, stable keeps scan order on ties
+            tree.food -= len(cell_eaters)
+            if self.recorder:
+                for creature in cell_eaters:
+                    self.recorder.feed(creature, tree)
+        
+        for tree in trees:
+            grid[tree.pos.x][tree.pos.y].append(tree)
+        
+        for k in np.flatnonzero(partner >= 0):
+            creature = creatures[k]
+            child = Creature(creature.pos)
+            grid[creature.pos.x][creature.pos.y].append(child)
+            self.population += 1
+            self.new_creatures += 1
+            if self.recorder:
+                self.recorder.mate(creature, creatures[partner[k]])
+                self.recorder.birth(child, creature)
+        
+        self.grid = grid
+        
     def find_closest_food(self, pos: Point2d):
         """Find the closest food source to the given position"""
         min_distance = float('inf')
@@ -150,6 +339,8 @@ class Simulation:
                 tree.food -= 1
                 creature_to_feed.food = True
                 self.food_eaten += 1
+                if self.recorder:
+                    self.recorder.feed(creature_to_feed, tree)
             else:
                 break
     
@@ -179,14 +370,20 @@ class Simulation:
                 creature.has_mated = True
                 self.new_creatures += 1
                 
-                cell.append(Creature(creature.pos))
+                child = Creature(creature.pos)
+                cell.append(child)
                 self.population += 1
+                if self.recorder:
+                    self.recorder.mate(creature, obj)
+                    self.recorder.birth(child, creature)
                 break
 
     def death(self, creature:Creature):
         """Remove instance of given Creature"""   
         self.grid[creature.pos.x][creature.pos.y].remove(creature)
         self.population -= 1
+        if self.recorder:
+            self.recorder.death(creature)
         
     def reset(self):
         """Reset trees and creature states"""
@@ -197,8 +394,12 @@ class Simulation:
                     if isinstance(obj, Creature):
                         obj.energy = self.default_energy
                         obj.food = False  # Reset creature's food state
+                        if self.recorder:
+                            self.recorder.reset(obj)
                     if isinstance(obj, Tree):
                         self.grid[i][j].remove(obj) # Remove all trees
+                        if self.recorder:
+                            self.recorder.remove_tree(obj)
         
         self.new_creatures = 0
         self.food_eaten = 0
@@ -208,6 +409,8 @@ class Simulation:
         """Save turn data to file"""                                     
         with open(self.filename, 'a') as outfile:
             outfile.write(f'\n{self.population}, {self.food_eaten}, {self.new_creatures}')
+        if self.recorder:
+            self.recorder.turn(self.population, self.food_eaten, self.new_creatures)
          
     def show_data(self, title: str, data_index: int):
         """Show graph of data"""
@@ -234,12 +437,14 @@ class Simulation:
         plt.tight_layout()
         plt.show()
     
-    def plot_grid(self):
-        """Visualize the grid of creatures"""
+    def plot_grid(self, grid: list = None):
+        """Visualize the grid of creatures, or a grid rebuilt by an EventReplayer"""
+        if grid is None:
+            grid = self.grid
         grid_data = np.zeros((self.grid_size, self.grid_size))
         for i in range(self.grid_size):
             for j in range(self.grid_size):
-                cell = self.grid[i][j]
+                cell = grid[i][j]
                 for obj in cell:
                     if isinstance(obj, Creature):
                         grid_data[i][j] += 1
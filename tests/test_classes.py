@@ -3,12 +3,14 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import tempfile
 import unittest
 from math import sqrt
 
 from classes.point2d import Point2d
 from classes.creature import Creature
 from classes.tree import Tree
+from classes.recorder import EventRecorder, EventReplayer
 
 class Test_Point2d(unittest.TestCase):
     """Test point2d class"""
@@ -114,4 +116,66 @@ class Test_Tree(unittest.TestCase):
         tree = Tree(pos, food)
         
         expected_repr = f"Tree({pos.x}, {pos.y}, {food})"
-        self.assertEqual(repr(tree), expected_repr)
\ No newline at end of file
+        self.assertEqual(repr(tree), expected_repr)
+        
+class Test_EventRecorder(unittest.TestCase):
+    """Test event recorder and replayer"""
+    def setUp(self):
+        """Set up test fixtures"""
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tempdir.name, 'events.log')
+        self.recorder = EventRecorder(self.filename, 5)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_repr(self):
+        self.assertEqual(repr(self.recorder), f"EventRecorder({self.filename}, 5)")
+
+    def test_replay(self):
+        """Test rebuilding the grid at each turn"""
+        creature = Creature(Point2d(0, 0))
+        tree = Tree(Point2d(1, 1), 2)
+        self.recorder.birth(creature)
+        self.recorder.tree(tree)
+        self.recorder.turn(1, 0, 0)
+
+        creature.move(Point2d(1, 1))
+        self.recorder.move(creature)
+        self.recorder.feed(creature, tree)
+        child = Creature(Point2d(1, 1))
+        self.recorder.birth(child, creature)
+        self.recorder.turn(2, 1, 1)
+
+        self.recorder.death(creature)
+        self.recorder.remove_tree(tree)
+        self.recorder.turn(1, 0, 0)
+
+        replayer = EventReplayer(self.filename, keyframe_interval=2)
+        self.assertEqual(len(replayer), 3)
+        self.assertEqual(replayer.statistics(0), [1, 2, 1])
+
+        grid = replayer.grid(0)
+        self.assertIsInstance(grid[0][0][0], Creature)
+        self.assertEqual(grid[1][1][0].food, 2)
+
+        grid = replayer.grid(1)
+        self.assertEqual(grid[0][0], [])
+        self.assertEqual(sum(isinstance(obj, Creature) for obj in grid[1][1]), 2)
+        self.assertEqual([obj.food for obj in grid[1][1] if isinstance(obj, Tree)], [1])
+
+        grid = replayer.grid(2)
+        self.assertEqual(len(grid[1][1]), 1)
+        self.assertIsInstance(grid[1][1][0], Creature)
+
+    def test_replay_turn_out_of_range(self):
+        self.recorder.turn(0, 0, 0)
+        replayer = EventReplayer(self.filename)
+        with self.assertRaises(IndexError):
+            replayer.grid(1)
+
+    def test_not_event_log(self):
+        with open(self.filename, 'wb') as outfile:
+            outfile.write(b'Population, Food eaten, New creatures')
+        with self.assertRaises(ValueError):
+            EventReplayer(self.filename)
@@ -6,6 +6,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 import matplotlib
 matplotlib.use('Agg')  # Set the backend to 'Agg' before importing pyplot
 
+import random
+import tempfile
 import unittest
 from unittest.mock import mock_open, patch
 
@@ -16,6 +18,7 @@ from main import Simulation
 from classes.point2d import Point2d
 from classes.creature import Creature
 from classes.tree import Tree
+from classes.recorder import EventReplayer
 
 class Test_Simulation(unittest.TestCase):
     """Test simulation"""
@@ -145,12 +148,108 @@ class Test_Simulation(unittest.TestCase):
         self.sim.turn()
         self.assertEqual(self.sim.current_turn, 1)
 
+    @patch('builtins.open', new_callable=mock_open)
+    def test_synchronous_turn(self, mock_file):
+        self.sim.synchronous = True
+        self.sim.populate_grid(self.start_population)
+        self.sim.add_trees()
+        self.sim.turn()
+        self.assertEqual(self.sim.current_turn, 1)
+        count = sum(1 for row in self.sim.grid for cell in row for obj in cell if isinstance(obj, Creature))
+        self.assertEqual(count, self.sim.population)
+
+    @patch.object(Simulation, 'reset')
+    @patch('builtins.open', new_callable=mock_open)
+    def test_synchronous_food_conflict(self, mock_file, mock_reset):
+        """Two creatures claiming a tree's last food"""
+        self.sim.synchronous = True
+        tree = Tree(Point2d(1, 1), food=1)
+        strong = Creature(Point2d(0, 0), energy=10)
+        weak = Creature(Point2d(2, 2), energy=5)
+        self.sim.grid[1][1].append(tree)
+        self.sim.grid[0][0].append(strong)
+        self.sim.grid[2][2].append(weak)
+        self.sim.population = 2
+
+        self.sim.turn()
+
+        self.assertIn(strong, self.sim.grid[1][1])
+        self.assertNotIn(weak, self.sim.grid[1][1])
+        self.assertEqual(tree.food, 0)
+        self.assertEqual(self.sim.population, 1)
+        self.assertEqual(self.sim.food_eaten, 1)
+
+    @patch.object(Simulation, 'reset')
+    @patch('builtins.open', new_callable=mock_open)
+    def test_synchronous_mate_conflict(self, mock_file, mock_reset):
+        """Three creatures claiming one mate"""
+        self.sim.synchronous = True
+        self.sim.grid[0][0].append(Tree(Point2d(0, 0), food=3))
+        creatures = [Creature(Point2d(0, 0)) for _ in range(3)]
+        self.sim.grid[0][0].extend(creatures)
+        self.sim.population = 3
+
+        self.sim.turn()
+
+        self.assertEqual([c.has_mated for c in creatures], [True, True, False])
+        self.assertEqual(self.sim.new_creatures, 1)
+        self.assertEqual(self.sim.population, 4)
+
+    @patch('builtins.open', new_callable=mock_open)
+    def test_synchronous_tiles_match(self, mock_file):
+        """Results do not depend on tile size or worker count"""
+        results = []
+        for tile_size, workers in [(1, 8), (3, 2), (self.grid_size, 1)]:
+            random.seed(0)
+            sim = Simulation(30, 20, self.grid_size, self.file, synchronous=True, workers=workers, tile_size=tile_size)
+            sim.start(self.turns)
+            results.append(mock_file().write.call_args_list[-self.turns - 1:])
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+
     @patch('builtins.open', new_callable=mock_open)
     def test_start(self, mock_file):
         self.sim.start(self.turns)
         self.assertEqual(self.sim.current_turn, self.turns + 1) # plus 1 for end of loop
         mock_file.assert_called()
         
+    def grid_state(self, grid):
+        """Sorted creature and tree state of a grid"""
+        creatures = sorted((obj.pos.x, obj.pos.y, obj.energy, obj.food, obj.has_mated)
+                           for row in grid for cell in row for obj in cell if isinstance(obj, Creature))
+        trees = sorted((obj.pos.x, obj.pos.y, obj.food)
+                       for row in grid for cell in row for obj in cell if isinstance(obj, Tree))
+        return creatures, trees
+
+    def test_replay_event_log(self):
+        """Replayed statistics and grid match the simulation"""
+        for synchronous in (False, True):
+            with tempfile.TemporaryDirectory() as tempdir:
+                csv_file = os.path.join(tempdir, 'simulation.csv')
+                log_file = os.path.join(tempdir, 'simulation.log')
+                sim = Simulation(self.start_population, self.num_trees, self.grid_size, csv_file,
+                                 synchronous=synchronous, log_filename=log_file)
+                
+                # Keep the live state as each turn is saved
+                states = []
+                save_turn_data = sim.save_turn_data
+                def save_and_keep_state():
+                    save_turn_data()
+                    states.append(self.grid_state(sim.grid))
+                sim.save_turn_data = save_and_keep_state
+                sim.start(self.turns)
+
+                with open(csv_file) as infile:
+                    rows = [[int(value) for value in line.split(',')] for line in infile.read().splitlines()[1:]]
+                replayer = EventReplayer(log_file, keyframe_interval=3)
+                self.assertEqual(len(replayer), len(rows))
+                self.assertEqual(replayer.statistics(0), [row[0] for row in rows])
+                self.assertEqual(replayer.statistics(1), [row[1] for row in rows])
+                self.assertEqual(replayer.statistics(2), [row[2] for row in rows])
+
+                for turn, state in enumerate(states):
+                    self.assertEqual(self.grid_state(replayer.grid(turn)), state)
+
     @patch('builtins.open', new_callable=mock_open)
     def test_save_turn_data(self, mock_file):
         self.sim.save_turn_data()